@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import otc
+
+# Golden-dataset regression + performance harness for the batch pipeline.
+#
+# For each scale (1x, 10x, 100x FY2024 trade volume) a seeded dataset is built
+# from scratch in a scratch project root, running every otc.py stage in its
+# own process (transactions -> reports -> embeds, dashboard). Then:
+#
+#   * correctness: aggregates read back from the CSVs, the baked dashboard
+#     and the chart embeds must match benchmarks/golden.json within REL_TOL;
+#   * performance: per-stage wall time, rows/s and peak RSS (from the
+#     instrumentation JSON lines) are compared against benchmarks/baseline.json.
+#
+#   python bench_pipeline.py                      # 1x and 10x, check both
+#   python bench_pipeline.py --scales 1,10,100
+#   python bench_pipeline.py --update-golden      # after an intended output change
+#   python bench_pipeline.py --update-baseline    # record new reference timings
+#
+# Exit status is non-zero on a golden mismatch or a scale with no golden entry,
+# or on a slowdown beyond --max-slowdown when --fail-on-regression is given.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+GOLDEN_PATH = os.path.join(BENCH_DIR, "golden.json")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+SEED = 2024
+REL_TOL = 1e-6
+NOISE_FLOOR_S = 0.2  # slowdowns smaller than this are not reported
+
+
+def make_workspace(path):
+    os.makedirs(os.path.join(path, "data"))
+    os.makedirs(os.path.join(path, "embeds"))
+    os.makedirs(os.path.join(path, "dashboard"))
+    for table in otc.REF_TABLES:
+        shutil.copy(os.path.join(ROOT, "data", table), os.path.join(path, "data", table))
+    shutil.copy(os.path.join(ROOT, "dashboard", "index.html"), os.path.join(path, "dashboard", "index.html"))
+
+
+def run_pipeline(workspace, scale):
+    """Run every stage in a fresh process; return {stage: {wall_s, records}}."""
+    results = {}
+    for name in otc.closure(list(otc.STAGES)):
+        module, func = otc.STAGES[name]["run"]
+        log_path = os.path.join(workspace, f"{name}.jsonl")
+        env = dict(os.environ, OTC_PROJECT_ROOT=workspace, OTC_STAGE_LOG=log_path,
+                   OTC_SEED=str(SEED), OTC_SCALE=str(scale))
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}; {module}.{func}()"],
+                       cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        wall = time.perf_counter() - started
+        with open(log_path) as f:
+            records = [json.loads(line) for line in f]
+        results[name] = {"wall_s": wall, "records": records}
+    return results
+
+
+def _js_array(html, name):
+    match = re.search(rf"const {name} = (\[.*?\]);", html, flags=re.DOTALL)
+    return json.loads(match.group(1))
+
+
+def _chart_data(path):
+    with open(path) as f:
+        match = re.search(r"data: \[(.*?)\]", f.read(), flags=re.DOTALL)
+    # json.loads fails loudly on anything that isn't valid JS numbers
+    return json.loads(f"[{match.group(1)}]")
+
+
+def aggregates(workspace):
+    import pandas as pd
+
+    data = os.path.join(workspace, "data")
+    tx = pd.read_csv(os.path.join(data, "01_transactions.csv"))
+    pnl = pd.read_csv(os.path.join(data, "02_monthly_pnl.csv"))
+    ledger = pd.read_csv(os.path.join(data, "03_account_ledger.csv"))
+    settled = tx[tx["status"] == "SETTLED"]
+
+    agg = {
+        "transactions.count": len(tx),
+        "transactions.settled": len(settled),
+        "transactions.idr_client_amount": tx["idr_client_amount"].sum(),
+        "transactions.gross_spread_idr": tx["gross_spread_idr"].sum(),
+        "transactions.tax_idr": tx["tax_idr"].sum(),
+        "transactions.net_pnl_idr": tx["net_pnl_idr"].sum(),
+        "monthly_pnl.rows": len(pnl),
+        "monthly_pnl.total_transactions": pnl["total_transactions"].sum(),
+        "monthly_pnl.total_net_pnl_idr": pnl["total_net_pnl_idr"].sum(),
+        "ledger.rows": len(ledger),
+        "ledger.amount_idr": ledger["amount_idr"].sum(),
+    }
+    for pair, value in settled.groupby("pair")["net_pnl_idr"].sum().items():
+        agg[f"transactions.net_pnl_idr[{pair}]"] = value
+    signed = ledger["amount_idr"].where(ledger["direction"] == "CREDIT", -ledger["amount_idr"])
+    for account_type, value in signed.groupby(ledger["account_type"]).sum().items():
+        agg[f"ledger.net[{account_type}]"] = value
+
+    with open(os.path.join(workspace, "dashboard", "index.html")) as f:
+        html = f.read()
+    monthly = _js_array(html, "monthly")
+    agg["dashboard.monthly.pnl"] = sum(m["pnl"] for m in monthly)
+    agg["dashboard.monthly.tx"] = sum(m["tx"] for m in monthly)
+    agg["dashboard.pairData.pnl"] = sum(p["pnl"] for p in _js_array(html, "pairData"))
+    agg["dashboard.clientPnl.pnl"] = sum(c["pnl"] for c in _js_array(html, "clientPnl"))
+    agg["dashboard.recentTx.rows"] = len(_js_array(html, "recentTx"))
+
+    embeds = os.path.join(workspace, "embeds")
+    agg["embeds.volume_by_pair"] = sum(_chart_data(os.path.join(embeds, "chart-01-volume-by-pair.html")))
+    agg["embeds.monthly_pnl"] = sum(_chart_data(os.path.join(embeds, "chart-02-monthly-pnl.html")))
+    agg["embeds.waterfall_net"] = _chart_data(os.path.join(embeds, "chart-03-waterfall.html"))[2]
+    agg["embeds.pnl_donut"] = sum(_chart_data(os.path.join(embeds, "chart-04-pnl-donut.html")))
+    agg["embeds.settlement_status"] = sum(_chart_data(os.path.join(embeds, "chart-05-settlement-status.html")))
+    return {k: float(v) for k, v in agg.items()}
+
+
+def check_golden(scale_key, agg, golden):
+    expected = golden.get(scale_key)
+    if expected is None:
+        print(f"  golden: ✗ no entry for {scale_key} (record it with --update-golden)")
+        return False
+    failures = []
+    for key in sorted(set(expected) | set(agg)):
+        want, got = expected.get(key), agg.get(key)
+        if want is None or got is None:
+            failures.append(f"{key}: expected {want}, got {got}")
+        elif abs(got - want) > REL_TOL * max(1.0, abs(want)):
+            failures.append(f"{key}: expected {want:,.6f}, got {got:,.6f}")
+    if failures:
+        print(f"  golden: {len(failures)} mismatch(es)")
+        for line in failures:
+            print(f"    ✗ {line}")
+        return False
+    print(f"  golden: {len(agg)} aggregates match")
+    return True
+
+
+def perf_summary(results):
+    """Flatten stage results to {stage or stage/substage: metrics}."""
+    summary = {}
+    for name, res in results.items():
+        rows = max((r["rows"] or 0) for r in res["records"])
+        summary[name] = {
+            "wall_s": round(res["wall_s"], 4),
+            "rows_per_s": round(rows / res["wall_s"], 1),
+            "peak_rss_mb": max(r["peak_rss_mb"] for r in res["records"]),
+        }
+        for r in res["records"]:
+            summary[f"{name}/{r['stage']}"] = {
+                "wall_s": r["wall_s"],
+                "rows_per_s": r.get("rows_per_s"),
+                "peak_rss_mb": r["peak_rss_mb"],
+            }
+    return summary
+
+
+def report_perf(summary, baseline, max_slowdown):
+    regressions = []
+    print(f"  {'stage':<30} {'wall s':>9} {'rows/s':>12} {'peak MB':>8} {'vs baseline':>12}")
+    for key, m in summary.items():
+        ref = baseline.get(key)
+        delta = ""
+        if ref and ref["wall_s"] > 0:
+            change = m["wall_s"] / ref["wall_s"] - 1
+            delta = f"{change:+.0%}"
+            if change > max_slowdown and m["wall_s"] - ref["wall_s"] > NOISE_FLOOR_S:
+                regressions.append(f"{key}: {ref['wall_s']:.3f}s -> {m['wall_s']:.3f}s ({delta})")
+                delta += " !"
+        rows_per_s = f"{m['rows_per_s']:,.0f}" if m["rows_per_s"] is not None else "-"
+        indent = "    " if "/" in key else "  "
+        print(f"{indent}{key:<{32 - len(indent)}} {m['wall_s']:>9.3f} {rows_per_s:>12} {m['peak_rss_mb']:>8.1f} {delta:>12}")
+    return regressions
+
+
+def load_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_json(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden regression + performance benchmark for the data pipeline")
+    parser.add_argument("--scales", default="1,10", help="comma-separated multiples of FY2024 volume")
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--max-slowdown", type=float, default=0.25, help="allowed wall-time increase (0.25 = 25%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch workspaces")
+    args = parser.parse_args()
+
+    golden, baseline = load_json(GOLDEN_PATH), load_json(BASELINE_PATH)
+    ok, regressions = True, []
+    for scale in (int(s) for s in args.scales.split(",")):
+        scale_key = f"{scale}x"
+        workspace = tempfile.mkdtemp(prefix=f"otc_bench_{scale_key}_")
+        try:
+            make_workspace(workspace)
+            print(f"\n== {scale_key} FY2024 (seed {SEED}) ==")
+            results = run_pipeline(workspace, scale)
+            agg = aggregates(workspace)
+            if args.update_golden:
+                golden[scale_key] = agg
+                print(f"  golden: recorded {len(agg)} aggregates")
+            else:
+                ok &= check_golden(scale_key, agg, golden)
+            summary = perf_summary(results)
+            regressions += [f"{scale_key} {r}" for r in report_perf(summary, baseline.get(scale_key, {}), args.max_slowdown)]
+            if args.update_baseline:
+                baseline[scale_key] = summary
+        finally:
+            if args.keep:
+                print(f"  workspace kept at {workspace}")
+            else:
+                shutil.rmtree(workspace, ignore_errors=True)
+
+    if args.update_golden:
+        save_json(GOLDEN_PATH, golden)
+    if args.update_baseline:
+        save_json(BASELINE_PATH, baseline)
+    if regressions:
+        print("\nSlower than baseline:")
+        for r in regressions:
+            print(f"  ! {r}")
+    if not ok or (regressions and args.fail_on_regression):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
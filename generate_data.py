@@ -1,13 +1,21 @@
-import pandas as pd
-import numpy as np
 import os
 from datetime import datetime, timedelta
 import random
 
+from instrumentation import stage
+
+# pandas/numpy are imported inside the functions that use them, so importing
+# this module (e.g. for PAIRS or TAX_RATE) stays cheap.
+
 # Configuration
-PROJECT_ROOT = "/Users/gilangfajar/Documents/Personal Files/Project/delomite/satu"
+PROJECT_ROOT = os.environ.get("OTC_PROJECT_ROOT", os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 
+# Reproducible / scaled runs (bench_pipeline.py): OTC_SEED fixes both RNGs,
+# OTC_SCALE multiplies the daily trade count (10 = 10x FY2024 volume).
+SEED = os.environ.get("OTC_SEED")
+SCALE = int(os.environ.get("OTC_SCALE", "1"))
+
 # Business Rules
 PAIRS = {
     "USDT/IDR": {"weight": 0.50, "spread_bps": (12, 28), "vol": 0.002, "base_rate": 15800, "crypto_min": 5000, "crypto_max": 500000, "crypto_lag": (0.1, 1.0), "fiat_lag": (1, 4)},
@@ -20,178 +28,236 @@ STATUS_WEIGHTS = {"SETTLED": 0.93, "PENDING": 0.03, "RECONCILING": 0.03, "FAILED
 TAX_RATE = 0.0021
 DIRECTION_WEIGHTS = {"BUY": 0.55, "SELL": 0.45}
 
-# Helper to load reference data
-def load_ref(filename):
-    return pd.read_csv(os.path.join(DATA_DIR, filename))
-
-clients = load_ref("ref_clients.csv")
-mms = load_ref("ref_market_makers.csv")
-banks = load_ref("ref_bank_accounts.csv")
-wallets = load_ref("ref_wallets.csv")
-exchanges = load_ref("ref_exchanges.csv")
-
-# Generate dates for FY 2024 (Trading days only)
-start_date = datetime(2024, 1, 1)
-end_date = datetime(2024, 12, 31)
-trading_days = pd.bdate_range(start=start_date, end=end_date)
-
-# Simulate Price Rates (GBM)
-daily_rates = {}
-for pair, cfg in PAIRS.items():
-    n = len(trading_days)
-    returns = np.random.normal(0, cfg["vol"], n)
-    rates = cfg["base_rate"] * np.exp(np.cumsum(returns))
-    daily_rates[pair] = dict(zip(trading_days.date, rates))
-
-# Main transaction data list
-transactions = []
-tx_id_counter = 1
-
-for day in trading_days:
-    num_tx = random.randint(18, 28)
-    for _ in range(num_tx):
-        pair = random.choices(list(PAIRS.keys()), weights=[c["weight"] for c in PAIRS.values()])[0]
-        cfg = PAIRS[pair]
-        
-        direction = random.choices(list(DIRECTION_WEIGHTS.keys()), weights=list(DIRECTION_WEIGHTS.values()))[0]
-        
-        # Time of trade
-        hour = random.randint(9, 17)
-        minute = random.randint(0, 59)
-        second = random.randint(0, 59)
-        trade_ts = day.replace(hour=hour, minute=minute, second=second)
-        
-        # Client & MMR
-        client = clients.sample(n=1).iloc[0]
-        mm = mms.sample(n=1).iloc[0]
-        
-        # Volume
-        volume = random.uniform(cfg["crypto_min"], cfg["crypto_max"])
-        
-        # Price
-        mid_price = daily_rates[pair][day.date()]
-        # MM adds a small deviation from mid
-        mm_price = mid_price * (1 + random.uniform(-0.001, 0.001))
-        
-        # Spread
-        spread_bps = random.randint(cfg["spread_bps"][0], cfg["spread_bps"][1])
-        spread_rate = spread_bps / 10000
-        
-        if direction == "BUY":
-            # Client pays more: MM + spread + tax
-            client_price = mm_price * (1 + spread_rate + TAX_RATE)
-        else:
-            # Client receives less: MM - spread - tax
-            client_price = mm_price * (1 - spread_rate - TAX_RATE)
-            
-        idr_mm_amount = volume * mm_price
-        idr_client_amount = volume * client_price
-        gross_spread = abs(idr_client_amount - idr_mm_amount)
-        tax_idr = idr_client_amount * TAX_RATE
-        
-        # Status
-        status = random.choices(list(STATUS_WEIGHTS.keys()), weights=list(STATUS_WEIGHTS.values()))[0]
-        
-        # Settlement Lags
-        crypto_lag_hrs = random.uniform(cfg["crypto_lag"][0], cfg["crypto_lag"][1])
-        fiat_lag_hrs = random.uniform(cfg["fiat_lag"][0], cfg["fiat_lag"][1])
-        
-        crypto_settled_at = trade_ts + timedelta(hours=crypto_lag_hrs)
-        fiat_settled_at = trade_ts + timedelta(hours=fiat_lag_hrs)
-        
-        pnl_ts = max(crypto_settled_at, fiat_settled_at)
-        pnl_month = pnl_ts.strftime("%Y-%m")
-        
-        net_pnl = gross_spread - tax_idr if status == "SETTLED" else 0
-        
-        # Assets
+# Reference data (loaded once, integer-coded; see refdata.py)
+def load_references():
+    import refdata
+    return refdata.load(DATA_DIR)
+
+def simulate_rates():
+    import numpy as np
+    import pandas as pd
+
+    # Generate dates for FY 2024 (Trading days only)
+    start_date = datetime(2024, 1, 1)
+    end_date = datetime(2024, 12, 31)
+    trading_days = pd.bdate_range(start=start_date, end=end_date)
+
+    # Simulate Price Rates (GBM)
+    daily_rates = {}
+    for pair, cfg in PAIRS.items():
+        n = len(trading_days)
+        returns = np.random.normal(0, cfg["vol"], n)
+        rates = cfg["base_rate"] * np.exp(np.cumsum(returns))
+        daily_rates[pair] = dict(zip(trading_days.date, rates))
+    return trading_days, daily_rates
+
+def generate_transactions(refs, trading_days, daily_rates, scale=SCALE):
+    import pandas as pd
+
+    # Resolve the per-trade reference picks up front: clients/MMs/exchanges
+    # are drawn by integer code, wallets and IDR banks come from hash indexes.
+    client_ids = list(refs.clients.ids)
+    mm_ids = list(refs.market_makers.ids)
+    exchange_ids = list(refs.exchanges.ids)
+    wallets = refs.wallets
+    client_wallet_by_asset = {}
+    for pair in PAIRS:
         asset = pair.split("/")[0]
-        client_wallet = wallets[wallets["asset"] == asset].iloc[0]["id"]
-        mm_wallet = wallets[wallets["type"] == "MM Settlement"].iloc[0]["id"]
-        bank_acc = banks[banks["currency"] == "IDR"].sample(n=1).iloc[0]["id"]
-        exchange_ref = exchanges.sample(n=1).iloc[0]["id"]
-
-        transactions.append({
-            "transaction_id": f"OTC-{tx_id_counter:05d}",
-            "trade_date": day.date().isoformat(),
-            "trade_timestamp": trade_ts.strftime("%Y-%m-%d %H:%M:%S"),
-            "pair": pair,
-            "direction": direction,
-            "client_id": client["id"],
-            "client_name": client["name"],
-            "client_type": client["type"],
-            "client_tier": client["tier"],
-            "market_maker_id": mm["id"],
-            "market_maker_name": mm["name"],
-            "volume_crypto": volume,
-            "mid_price_idr": mid_price,
-            "mm_price_idr": mm_price,
-            "client_price_idr": client_price,
-            "spread_bps": spread_bps,
-            "idr_mm_amount": idr_mm_amount,
-            "idr_client_amount": idr_client_amount,
-            "gross_spread_idr": gross_spread,
-            "tax_idr": tax_idr,
-            "net_pnl_idr": net_pnl,
-            "bank_account_id": bank_acc,
-            "client_wallet_id": client_wallet,
-            "mm_wallet_id": mm_wallet,
-            "crypto_settlement_timestamp": crypto_settled_at.strftime("%Y-%m-%d %H:%M:%S"),
-            "fiat_settlement_timestamp": fiat_settled_at.strftime("%Y-%m-%d %H:%M:%S"),
-            "pnl_recognition_timestamp": pnl_ts.strftime("%Y-%m-%d %H:%M:%S"),
-            "pnl_recognition_month": pnl_month,
-            "status": status,
-            "exchange_ref": exchange_ref,
-            "notes": ""
-        })
-        tx_id_counter += 1
+        client_wallet_by_asset[asset] = wallets.ids[wallets.where("asset", asset)[0]]
+    mm_wallet = wallets.ids[wallets.where("type", "MM Settlement")[0]]
+    idr_bank_ids = list(refs.banks.ids[refs.banks.where("currency", "IDR")])
+
+    # Main transaction data list
+    transactions = []
+    tx_id_counter = 1
+
+    for day in trading_days:
+        num_tx = random.randint(18, 28) * scale
+        for _ in range(num_tx):
+            pair = random.choices(list(PAIRS.keys()), weights=[c["weight"] for c in PAIRS.values()])[0]
+            cfg = PAIRS[pair]
+
+            direction = random.choices(list(DIRECTION_WEIGHTS.keys()), weights=list(DIRECTION_WEIGHTS.values()))[0]
+
+            # Time of trade
+            hour = random.randint(9, 17)
+            minute = random.randint(0, 59)
+            second = random.randint(0, 59)
+            trade_ts = day.replace(hour=hour, minute=minute, second=second)
+
+            # Client & MMR
+            client_id = random.choice(client_ids)
+            mm_id = random.choice(mm_ids)
+
+            # Volume
+            volume = random.uniform(cfg["crypto_min"], cfg["crypto_max"])
+
+            # Price
+            mid_price = daily_rates[pair][day.date()]
+            # MM adds a small deviation from mid
+            mm_price = mid_price * (1 + random.uniform(-0.001, 0.001))
+
+            # Spread
+            spread_bps = random.randint(cfg["spread_bps"][0], cfg["spread_bps"][1])
+            spread_rate = spread_bps / 10000
+
+            if direction == "BUY":
+                # Client pays more: MM + spread + tax
+                client_price = mm_price * (1 + spread_rate + TAX_RATE)
+            else:
+                # Client receives less: MM - spread - tax
+                client_price = mm_price * (1 - spread_rate - TAX_RATE)
+
+            idr_mm_amount = volume * mm_price
+            idr_client_amount = volume * client_price
+            gross_spread = abs(idr_client_amount - idr_mm_amount)
+            tax_idr = idr_client_amount * TAX_RATE
 
-df_tx = pd.DataFrame(transactions)
-df_tx.to_csv(os.path.join(DATA_DIR, "01_transactions.csv"), index=False)
+            # Status
+            status = random.choices(list(STATUS_WEIGHTS.keys()), weights=list(STATUS_WEIGHTS.values()))[0]
+
+            # Settlement Lags
+            crypto_lag_hrs = random.uniform(cfg["crypto_lag"][0], cfg["crypto_lag"][1])
+            fiat_lag_hrs = random.uniform(cfg["fiat_lag"][0], cfg["fiat_lag"][1])
+
+            crypto_settled_at = trade_ts + timedelta(hours=crypto_lag_hrs)
+            fiat_settled_at = trade_ts + timedelta(hours=fiat_lag_hrs)
+
+            pnl_ts = max(crypto_settled_at, fiat_settled_at)
+            pnl_month = pnl_ts.strftime("%Y-%m")
+
+            net_pnl = gross_spread - tax_idr if status == "SETTLED" else 0
+
+            # Assets
+            asset = pair.split("/")[0]
+            client_wallet = client_wallet_by_asset[asset]
+            bank_acc = random.choice(idr_bank_ids)
+            exchange_ref = random.choice(exchange_ids)
+
+            transactions.append({
+                "transaction_id": f"OTC-{tx_id_counter:05d}",
+                "trade_date": day.date().isoformat(),
+                "trade_timestamp": trade_ts.strftime("%Y-%m-%d %H:%M:%S"),
+                "pair": pair,
+                "direction": direction,
+                # names/type/tier are resolved from the ref tables on read
+                "client_id": client_id,
+                "market_maker_id": mm_id,
+                "volume_crypto": volume,
+                "mid_price_idr": mid_price,
+                "mm_price_idr": mm_price,
+                "client_price_idr": client_price,
+                "spread_bps": spread_bps,
+                "idr_mm_amount": idr_mm_amount,
+                "idr_client_amount": idr_client_amount,
+                "gross_spread_idr": gross_spread,
+                "tax_idr": tax_idr,
+                "net_pnl_idr": net_pnl,
+                "bank_account_id": bank_acc,
+                "client_wallet_id": client_wallet,
+                "mm_wallet_id": mm_wallet,
+                "crypto_settlement_timestamp": crypto_settled_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "fiat_settlement_timestamp": fiat_settled_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "pnl_recognition_timestamp": pnl_ts.strftime("%Y-%m-%d %H:%M:%S"),
+                "pnl_recognition_month": pnl_month,
+                "status": status,
+                "exchange_ref": exchange_ref,
+                "notes": ""
+            })
+            tx_id_counter += 1
+
+    return pd.DataFrame(transactions)
 
 # 02_monthly_pnl.csv
-settled_df = df_tx[df_tx["status"] == "SETTLED"]
-monthly_pnl = settled_df.groupby(["pnl_recognition_month", "pair"]).agg(
-    total_transactions=("transaction_id", "count"),
-    total_volume_crypto=("volume_crypto", "sum"),
-    total_idr_client_amount=("idr_client_amount", "sum"),
-    total_gross_spread_idr=("gross_spread_idr", "sum"),
-    total_tax_idr=("tax_idr", "sum"),
-    total_net_pnl_idr=("net_pnl_idr", "sum"),
-    avg_spread_bps=("spread_bps", "mean")
-).reset_index()
-monthly_pnl.to_csv(os.path.join(DATA_DIR, "02_monthly_pnl.csv"), index=False)
+def build_monthly_pnl(df_tx):
+    settled_df = df_tx[df_tx["status"] == "SETTLED"]
+    return settled_df.groupby(["pnl_recognition_month", "pair"]).agg(
+        total_transactions=("transaction_id", "count"),
+        total_volume_crypto=("volume_crypto", "sum"),
+        total_idr_client_amount=("idr_client_amount", "sum"),
+        total_gross_spread_idr=("gross_spread_idr", "sum"),
+        total_tax_idr=("tax_idr", "sum"),
+        total_net_pnl_idr=("net_pnl_idr", "sum"),
+        avg_spread_bps=("spread_bps", "mean")
+    ).reset_index()
 
 # 03_account_ledger.csv (Dual Entry style)
-ledger = []
-for idx, row in settled_df.iterrows():
-    # Crypto Leg
-    ledger.append({
-        "account_id": row["client_wallet_id"],
-        "account_type": "Wallet",
-        "transaction_id": row["transaction_id"],
-        "trade_date": row["trade_date"],
-        "pair": row["pair"],
-        "direction": "CREDIT" if row["direction"] == "BUY" else "DEBIT",
-        "amount_idr": row["idr_client_amount"], # For simplification, we track IDR equivalent in ledger
-        "settlement_timestamp": row["crypto_settlement_timestamp"],
-        "counterparty": row["market_maker_name"],
-        "status": "SETTLED"
-    })
-    # Fiat Leg
-    ledger.append({
-        "account_id": row["bank_account_id"],
-        "account_type": "Bank",
-        "transaction_id": row["transaction_id"],
-        "trade_date": row["trade_date"],
-        "pair": row["pair"],
-        "direction": "DEBIT" if row["direction"] == "BUY" else "CREDIT",
-        "amount_idr": row["idr_client_amount"],
-        "settlement_timestamp": row["fiat_settlement_timestamp"],
-        "counterparty": row["client_name"],
-        "status": "SETTLED"
-    })
-
-pd.DataFrame(ledger).to_csv(os.path.join(DATA_DIR, "03_account_ledger.csv"), index=False)
-
-print(f"Generated {len(df_tx)} transactions.")
+def build_ledger(df_tx, refs):
+    import pandas as pd
+    settled_df = refs.enrich(df_tx[df_tx["status"] == "SETTLED"])
+    ledger = []
+    for idx, row in settled_df.iterrows():
+        # Crypto Leg
+        ledger.append({
+            "account_id": row["client_wallet_id"],
+            "account_type": "Wallet",
+            "transaction_id": row["transaction_id"],
+            "trade_date": row["trade_date"],
+            "pair": row["pair"],
+            "direction": "CREDIT" if row["direction"] == "BUY" else "DEBIT",
+            "amount_idr": row["idr_client_amount"], # For simplification, we track IDR equivalent in ledger
+            "settlement_timestamp": row["crypto_settlement_timestamp"],
+            "counterparty": row["market_maker_name"],
+            "status": "SETTLED"
+        })
+        # Fiat Leg
+        ledger.append({
+            "account_id": row["bank_account_id"],
+            "account_type": "Bank",
+            "transaction_id": row["transaction_id"],
+            "trade_date": row["trade_date"],
+            "pair": row["pair"],
+            "direction": "DEBIT" if row["direction"] == "BUY" else "CREDIT",
+            "amount_idr": row["idr_client_amount"],
+            "settlement_timestamp": row["fiat_settlement_timestamp"],
+            "counterparty": row["client_name"],
+            "status": "SETTLED"
+        })
+
+    return pd.DataFrame(ledger)
+
+def write_transactions():
+    if SEED is not None:
+        import numpy as np
+        random.seed(int(SEED))
+        np.random.seed(int(SEED))
+
+    with stage("generate_data", "reference_data") as s:
+        refs = load_references()
+        s["rows"] = sum(len(t) for t in refs.tables.values())
+
+    with stage("generate_data", "simulate_rates") as s:
+        trading_days, daily_rates = simulate_rates()
+        s["rows"] = len(trading_days) * len(PAIRS)
+
+    with stage("generate_data", "transactions") as s:
+        df_tx = generate_transactions(refs, trading_days, daily_rates)
+        df_tx.to_csv(os.path.join(DATA_DIR, "01_transactions.csv"), index=False)
+        s["rows"] = len(df_tx)
+    return df_tx
+
+def write_reports(df_tx=None):
+    """Monthly PnL + ledger; reads 01_transactions.csv when not handed a frame."""
+    if df_tx is None:
+        import pandas as pd
+        # round_trip: the default parser can be off by an ulp, which would
+        # rewrite every amount in the derived reports
+        df_tx = pd.read_csv(os.path.join(DATA_DIR, "01_transactions.csv"), float_precision="round_trip")
+
+    with stage("generate_data", "monthly_pnl") as s:
+        monthly_pnl = build_monthly_pnl(df_tx)
+        monthly_pnl.to_csv(os.path.join(DATA_DIR, "02_monthly_pnl.csv"), index=False)
+        s["rows"] = len(monthly_pnl)
+
+    with stage("generate_data", "ledger") as s:
+        ledger = build_ledger(df_tx, load_references())
+        ledger.to_csv(os.path.join(DATA_DIR, "03_account_ledger.csv"), index=False)
+        s["rows"] = len(ledger)
+
+def main():
+    df_tx = write_transactions()
+    write_reports(df_tx)
+    print(f"Generated {len(df_tx)} transactions.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+# Stage timing for the batch scripts (generate_data / generate_embeds /
+# optimize_dashboard). Each stage emits one JSON line with wall time, rows
+# processed and peak RSS so far:
+#
+#   {"script": "generate_data", "stage": "transactions", "rows": 6059,
+#    "wall_s": 0.4415, "rows_per_s": 13722.4, "peak_rss_mb": 83.9}
+#
+# Lines go to stderr (stdout keeps the human-readable progress output), or are
+# appended to the file named by OTC_STAGE_LOG.
+
+STAGE_LOG_ENV = "OTC_STAGE_LOG"
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def emit(record):
+    line = json.dumps(record)
+    path = os.environ.get(STAGE_LOG_ENV)
+    if path:
+        with open(path, "a") as f:
+            f.write(line + "\n")
+    else:
+        print(line, file=sys.stderr)
+
+
+@contextmanager
+def stage(script, name):
+    """Time a pipeline stage; set ``rec["rows"]`` inside the block to report throughput."""
+    rec = {"script": script, "stage": name, "rows": None}
+    started = time.perf_counter()
+    try:
+        yield rec
+    finally:
+        wall = time.perf_counter() - started
+        rec["wall_s"] = round(wall, 4)
+        if rec["rows"] is not None and wall > 0:
+            rec["rows_per_s"] = round(rec["rows"] / wall, 1)
+        rec["peak_rss_mb"] = round(peak_rss_mb(), 1)
+        emit(rec)
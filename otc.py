@@ -0,0 +1,300 @@
+import argparse
+import csv
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+# Unified pipeline CLI:
+#
+#   ref_*.csv -> transactions -> reports (monthly PnL + ledger) -> embeds
+#                            \-> dashboard
+#
+# Each stage declares its input/output files and the script that implements
+# it. Inputs (and the script itself) are content-hashed; a stage reruns only
+# when that fingerprint differs from the last successful run or an output is
+# missing. Stages whose dependencies are done run concurrently in separate
+# processes, so the embeds and the dashboard bake overlap.
+#
+# Without .otc_state.json (a fresh clone: the state file is not committed) the
+# outputs already on disk are adopted as built, so cloning and running build
+# leaves the committed data, embeds and dashboard alone.
+#
+# "transactions" is a source stage: the generator is random (unless OTC_SEED
+# is set) and its output is the committed dataset, so it is only rebuilt when
+# the file is missing or when it is named with --force -- never because the
+# generator changed or because a downstream target was forced.
+#
+#   python otc.py build              # bring everything up to date
+#   python otc.py build embeds       # one target (plus stale upstream stages)
+#   python otc.py build --force      # rerun every derived stage
+#   python otc.py build transactions --force   # regenerate the dataset
+#   python otc.py status             # show what is stale without running
+#   python otc.py transactions|reports|embeds|dashboard   # = build <stage>
+
+PROJECT_ROOT = os.environ.get("OTC_PROJECT_ROOT", os.path.dirname(os.path.abspath(__file__)))
+STATE_PATH = os.path.join(PROJECT_ROOT, ".otc_state.json")
+
+REF_TABLES = ["ref_clients.csv", "ref_market_makers.csv", "ref_bank_accounts.csv",
+              "ref_wallets.csv", "ref_exchanges.csv"]
+EMBEDS = ["chart-01-volume-by-pair.html", "chart-02-monthly-pnl.html", "chart-03-waterfall.html",
+          "chart-04-pnl-donut.html", "chart-05-settlement-status.html"]
+
+# name -> deps, inputs, outputs, (module, function). An input may be
+# (path, column) to hash one CSV column only. Source stages never go stale on
+# their inputs; their fingerprint only drives the "generator inputs changed"
+# note in status, which should fire when a client or market maker is added,
+# not when one changes tier or name.
+STAGES = {
+    "transactions": {
+        "source": True,
+        "deps": [],
+        "inputs": [("data/ref_clients.csv", "id"), ("data/ref_market_makers.csv", "id"),
+                   "data/ref_bank_accounts.csv", "data/ref_wallets.csv", "data/ref_exchanges.csv",
+                   "generate_data.py", "refdata.py"],
+        "outputs": ["data/01_transactions.csv"],
+        "run": ("generate_data", "write_transactions"),
+    },
+    "reports": {
+        "deps": ["transactions"],
+        "inputs": ["data/01_transactions.csv", "data/ref_clients.csv", "data/ref_market_makers.csv",
+                   "generate_data.py", "refdata.py"],
+        "outputs": ["data/02_monthly_pnl.csv", "data/03_account_ledger.csv"],
+        "run": ("generate_data", "write_reports"),
+    },
+    "embeds": {
+        "deps": ["reports"],
+        "inputs": ["data/01_transactions.csv", "data/02_monthly_pnl.csv", "generate_embeds.py"],
+        "outputs": [f"embeds/{e}" for e in EMBEDS],
+        "run": ("generate_embeds", "main"),
+    },
+    "dashboard": {
+        "deps": ["transactions"],
+        "inputs": ["data/01_transactions.csv", "data/ref_clients.csv", "optimize_dashboard.py", "refdata.py"],
+        "outputs": ["dashboard/index.html"],
+        "run": ("optimize_dashboard", "optimize"),
+    },
+}
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def column_digest(path, column):
+    with open(path, newline="") as f:
+        values = [row[column] for row in csv.DictReader(f)]
+    return hashlib.sha256("\n".join(values).encode()).hexdigest()
+
+
+def fingerprint(name):
+    """Combined hash of a stage's inputs; None if an input is missing."""
+    h = hashlib.sha256(name.encode())
+    for entry in STAGES[name]["inputs"]:
+        rel, column = entry if isinstance(entry, tuple) else (entry, None)
+        path = os.path.join(PROJECT_ROOT, rel)
+        if not os.path.exists(path):
+            return None
+        if column:
+            h.update(f"{rel}:{column}".encode())
+            h.update(column_digest(path, column).encode())
+        else:
+            h.update(rel.encode())
+            h.update(file_digest(path).encode())
+    return h.hexdigest()
+
+
+def load_state():
+    try:
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def adopt_existing():
+    """State for a tree with no state file: every stage whose outputs exist counts as built."""
+    state = {}
+    for name in STAGES:
+        if all(os.path.exists(os.path.join(PROJECT_ROOT, o)) for o in STAGES[name]["outputs"]):
+            fp = fingerprint(name)
+            if fp is not None:
+                state[name] = fp
+    return state
+
+
+def save_state(state):
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+def stale_reason(name, state):
+    missing = [o for o in STAGES[name]["outputs"] if not os.path.exists(os.path.join(PROJECT_ROOT, o))]
+    if missing:
+        return f"missing {missing[0]}"
+    if STAGES[name].get("source"):
+        return None
+    fp = fingerprint(name)
+    if fp is None:
+        return "missing input"
+    if state.get(name) != fp:
+        return "inputs changed" if name in state else "never built"
+    return None
+
+
+def closure(targets):
+    """Targets plus everything upstream, in topological order."""
+    order, seen = [], set()
+
+    def visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for dep in STAGES[name]["deps"]:
+            visit(dep)
+        order.append(name)
+
+    for t in targets:
+        visit(t)
+    return order
+
+
+def _run_stage(name):
+    # runs in a worker process
+    os.environ["OTC_PROJECT_ROOT"] = PROJECT_ROOT
+    module, func = STAGES[name]["run"]
+    started = time.perf_counter()
+    getattr(importlib.import_module(module), func)()
+    return time.perf_counter() - started
+
+
+def build(targets, force=(), jobs=None, dry_run=False):
+    """Run stale stages needed for targets; stages named in force always run."""
+    plan = closure(targets)
+    if os.path.exists(STATE_PATH):
+        state = load_state()
+    else:
+        state = adopt_existing()
+        print(f"  no {os.path.basename(STATE_PATH)}: adopting existing outputs of {', '.join(state) or 'no stages'}")
+        if not dry_run:
+            save_state(state)
+    pending = {name: set(STAGES[name]["deps"]) & set(plan) for name in plan}
+    rerun = set()  # stages run (or, in a dry run, that would run) this build
+    running = {}
+    failed = False
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            ready = [n for n, deps in pending.items() if not deps]
+            for name in ready:
+                del pending[name]
+                reason = "forced" if name in force else stale_reason(name, state)
+                if dry_run and reason is None and any(d in rerun for d in STAGES[name]["deps"]):
+                    reason = "upstream stale"
+                if reason is None:
+                    print(f"  = {name:<13} up to date")
+                    for deps in pending.values():
+                        deps.discard(name)
+                    continue
+                if dry_run:
+                    print(f"  * {name:<13} would run ({reason})")
+                    rerun.add(name)
+                    for deps in pending.values():
+                        deps.discard(name)
+                    continue
+                print(f"  > {name:<13} running ({reason})")
+                running[pool.submit(_run_stage, name)] = name
+
+            if not running:
+                if pending and not any(not deps for deps in pending.values()):
+                    break
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    elapsed = fut.result()
+                except Exception as exc:
+                    print(f"  ! {name:<13} failed: {exc!r}")
+                    failed = True
+                    # drop everything downstream of the failure
+                    blocked = {n for n in pending if name in closure([n])}
+                    for n in blocked:
+                        print(f"  - {n:<13} skipped (depends on {name})")
+                        del pending[n]
+                    continue
+                state[name] = fingerprint(name)
+                save_state(state)
+                rerun.add(name)
+                print(f"  ✓ {name:<13} done in {elapsed:.2f}s")
+                for deps in pending.values():
+                    deps.discard(name)
+
+    return 1 if failed else 0
+
+
+def status():
+    if os.path.exists(STATE_PATH):
+        state = load_state()
+    else:
+        state = adopt_existing()
+        print(f"  (no {os.path.basename(STATE_PATH)}: existing outputs will be adopted on the next build)")
+    stale = set()
+    for name in closure(list(STAGES)):
+        reason = stale_reason(name, state)
+        if reason is None and stale & set(STAGES[name]["deps"]):
+            reason = "upstream stale"
+        if reason is not None:
+            stale.add(name)
+        note = ""
+        if reason is None and STAGES[name].get("source") and name in state and state[name] != fingerprint(name):
+            note = f" (generator inputs changed; `otc.py build {name} --force` to regenerate)"
+        print(f"  {name:<13} {'up to date' if reason is None else 'stale: ' + reason}{note}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="otc", description="OTC reconciliation data pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_build_flags(p):
+        p.add_argument("--force", action="store_true", help="rerun the named stages even if up to date")
+        p.add_argument("--dry-run", action="store_true", help="show what would run")
+        p.add_argument("-j", "--jobs", type=int, default=None, help="max concurrent stages")
+
+    p_build = sub.add_parser("build", help="run stale pipeline stages")
+    p_build.add_argument("targets", nargs="*", metavar="TARGET",
+                         help=f"one of: {', '.join(STAGES)} (default: all)")
+    add_build_flags(p_build)
+    sub.add_parser("status", help="show which stages are stale")
+    for name in STAGES:
+        add_build_flags(sub.add_parser(name, help=f"build {name} and stale upstream stages"))
+
+    args = parser.parse_args(argv)
+    if args.command == "status":
+        return status()
+    if args.command == "build":
+        unknown = [t for t in args.targets if t not in STAGES]
+        if unknown:
+            parser.error(f"unknown target {unknown[0]!r} (choose from {', '.join(STAGES)})")
+        targets = args.targets or list(STAGES)
+        # a bare --force reruns derived stages; source stages only when named
+        named = args.targets or [n for n in STAGES if not STAGES[n].get("source")]
+    else:
+        targets = named = [args.command]
+    force = set(named) if args.force else set()
+    return build(targets, force=force, jobs=args.jobs, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Treasury position engine.
+#
+# Running balances per account are built from 03_account_ledger.csv by sorting
+# the legs once by (account, settlement time) and taking a single cumulative
+# sum, re-based at each account boundary. As-of queries are a binary search on
+# the account's timeline. New legs append in place; a late (out-of-order) leg
+# only recomputes that account's suffix.
+#
+# Sign convention: CREDIT adds to the account, DEBIT subtracts. Wallet legs
+# carry their IDR equivalent (the ledger tracks IDR), so crypto positions are
+# IDR-denominated exposures rather than coin balances.
+#
+# Peak unsettled exposure: between a trade's first and second leg settling,
+# one side has been delivered and the other has not. Trades that are not
+# settled (PENDING, RECONCILING, FAILED) still owe their second leg, so their
+# window stays open until the query horizon. unsettled_exposure() sweeps those
+# windows per counterparty and reports the intraday peak.
+
+PROJECT_ROOT = os.environ.get("OTC_PROJECT_ROOT", os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+SIGN = {"CREDIT": 1.0, "DEBIT": -1.0}
+NAT = np.iinfo(np.int64).min  # NaT after the int64 cast in _to_ns
+
+
+def _to_ns(values):
+    return pd.to_datetime(values, format=TS_FORMAT).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+
+
+def _ts_ns(at):
+    return pd.Timestamp(at).value
+
+
+class _Timeline:
+    """Settlement times and post-leg balances for one account (growable arrays)."""
+
+    def __init__(self, times, balances):
+        self.n = len(times)
+        cap = max(16, self.n * 2)
+        self.times = np.empty(cap, dtype=np.int64)
+        self.balances = np.empty(cap, dtype=np.float64)
+        self.times[:self.n] = times
+        self.balances[:self.n] = balances
+
+    def _reserve(self, extra):
+        need = self.n + extra
+        if need > len(self.times):
+            cap = max(need, len(self.times) * 2)
+            self.times = np.resize(self.times, cap)
+            self.balances = np.resize(self.balances, cap)
+
+    def as_of(self, t):
+        i = np.searchsorted(self.times[:self.n], t, side="right")
+        return self.balances[i - 1] if i else 0.0
+
+    def add(self, times, deltas):
+        """Merge legs (any order) into the timeline."""
+        if not len(times):
+            return
+        order = np.argsort(times, kind="stable")
+        times, deltas = times[order], deltas[order]
+        self._reserve(len(times))
+        last = self.times[self.n - 1] if self.n else np.iinfo(np.int64).min
+        if times[0] >= last:
+            # common case: legs arrive in time order -> pure append
+            base = self.balances[self.n - 1] if self.n else 0.0
+            self.times[self.n:self.n + len(times)] = times
+            self.balances[self.n:self.n + len(times)] = base + np.cumsum(deltas)
+            self.n += len(times)
+            return
+        # late legs: recompute from the earliest insertion point onwards
+        k = np.searchsorted(self.times[:self.n], times[0], side="right")
+        old_times = self.times[k:self.n]
+        prev = self.balances[k - 1] if k else 0.0
+        old_deltas = np.diff(self.balances[k:self.n], prepend=prev)
+        merged_t = np.concatenate([old_times, times])
+        merged_d = np.concatenate([old_deltas, deltas])
+        order = np.argsort(merged_t, kind="stable")
+        end = k + len(merged_t)
+        self.times[k:end] = merged_t[order]
+        self.balances[k:end] = prev + np.cumsum(merged_d[order])
+        self.n = end
+
+
+class PositionBook:
+    def __init__(self):
+        self.timelines = {}
+        self.account_types = {}
+
+    @classmethod
+    def from_ledger(cls, ledger):
+        """Build running balances for every account with one sort + one cumsum."""
+        book = cls()
+        accounts, codes = np.unique(ledger["account_id"].to_numpy(), return_inverse=True)
+        times = _to_ns(ledger["settlement_timestamp"])
+        deltas = ledger["amount_idr"].to_numpy(dtype=np.float64) * ledger["direction"].map(SIGN).to_numpy()
+
+        order = np.lexsort((times, codes))
+        codes, times, deltas = codes[order], times[order], deltas[order]
+        running = np.cumsum(deltas)
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(codes)]
+        # re-base the global cumsum so each account starts from zero
+        offsets = np.where(starts > 0, running[starts - 1], 0.0)
+        balances = running - np.repeat(offsets, ends - starts)
+
+        for code, s, e in zip(codes[starts], starts, ends):
+            book.timelines[accounts[code]] = _Timeline(times[s:e], balances[s:e])
+        types = ledger.drop_duplicates("account_id").set_index("account_id")["account_type"]
+        book.account_types.update(types.to_dict())
+        return book
+
+    @classmethod
+    def from_csv(cls, path=None):
+        return cls.from_ledger(pd.read_csv(path or os.path.join(DATA_DIR, "03_account_ledger.csv")))
+
+    @property
+    def accounts(self):
+        return sorted(self.timelines)
+
+    def balance(self, account_id, at):
+        """Balance of one account as of `at` (legs settling exactly at `at` included)."""
+        timeline = self.timelines.get(account_id)
+        return timeline.as_of(_ts_ns(at)) if timeline else 0.0
+
+    def balances(self, at, account_type=None):
+        """All account balances as of `at`, optionally only "Bank" or "Wallet"."""
+        t = _ts_ns(at)
+        return pd.Series({
+            acc: tl.as_of(t) for acc, tl in sorted(self.timelines.items())
+            if account_type is None or self.account_types.get(acc) == account_type
+        }, name="balance_idr", dtype=np.float64)
+
+    def timeline(self, account_id):
+        tl = self.timelines[account_id]
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(tl.times[:tl.n]),
+            "balance_idr": tl.balances[:tl.n],
+        })
+
+    def add_legs(self, legs):
+        """Incrementally apply new ledger legs (same columns as the ledger CSV)."""
+        times = _to_ns(legs["settlement_timestamp"])
+        deltas = legs["amount_idr"].to_numpy(dtype=np.float64) * legs["direction"].map(SIGN).to_numpy()
+        accounts = legs["account_id"].to_numpy()
+        for account in pd.unique(accounts):
+            mask = accounts == account
+            tl = self.timelines.get(account)
+            if tl is None:
+                tl = self.timelines[account] = _Timeline(np.empty(0, np.int64), np.empty(0))
+            tl.add(times[mask], deltas[mask])
+        if "account_type" in legs:
+            for acc, typ in zip(accounts, legs["account_type"].to_numpy()):
+                self.account_types.setdefault(acc, typ)
+
+
+def unsettled_exposure(transactions, counterparty="client_id", horizon=None, settled_statuses=("SETTLED",)):
+    """Peak intraday unsettled exposure per counterparty per day, up to `horizon`.
+
+    A trade is exposed for idr_client_amount from its first leg settling. For
+    settled trades the window closes when the second leg settles; for any
+    other status (PENDING, RECONCILING, FAILED) the second leg is still owed
+    and the window stays open until `horizon` (default: the latest settlement
+    timestamp in the data). A missing timestamp is an outstanding leg; a trade
+    with no leg settled carries no exposure. Returns one row per
+    (counterparty, date) with the peak level, when it was reached, and the
+    exposure carried in from the previous day.
+    """
+    crypto = _to_ns(transactions["crypto_settlement_timestamp"])
+    fiat = _to_ns(transactions["fiat_settlement_timestamp"])
+    amount = transactions["idr_client_amount"].to_numpy(dtype=np.float64)
+    cp = transactions[counterparty].to_numpy()
+    has_crypto, has_fiat = crypto != NAT, fiat != NAT
+    if horizon is None:
+        horizon = max(crypto[has_crypto].max(initial=NAT), fiat[has_fiat].max(initial=NAT))
+    else:
+        horizon = _ts_ns(horizon)
+
+    # first leg: the earlier of the two (or the only one present)
+    start = np.where(has_crypto & has_fiat, np.minimum(crypto, fiat), np.where(has_crypto, crypto, fiat))
+    settled = transactions["status"].isin(settled_statuses).to_numpy() & has_crypto & has_fiat
+    end = np.minimum(np.where(settled, np.maximum(crypto, fiat), horizon), horizon)
+    open_mask = (has_crypto | has_fiat) & (start < end)
+    start, end = start[open_mask], end[open_mask]
+    amount, cp = amount[open_mask], cp[open_mask]
+
+    # sweep: +amount when the window opens, -amount when it closes; closes sort
+    # before opens at the same instant so back-to-back trades don't double count
+    events = pd.DataFrame({
+        "counterparty": np.concatenate([cp, cp]),
+        "time": np.concatenate([start, end]),
+        "kind": np.concatenate([np.ones(len(start), np.int8), np.zeros(len(end), np.int8)]),
+        "delta": np.concatenate([amount, -amount]),
+    }).sort_values(["counterparty", "time", "kind"], kind="stable", ignore_index=True)
+    events["exposure"] = events.groupby("counterparty", sort=False)["delta"].cumsum()
+    events["carried_in"] = events.groupby("counterparty", sort=False)["exposure"].shift(fill_value=0.0)
+    events["date"] = pd.to_datetime(events["time"]).dt.normalize()
+
+    by_day = events.groupby(["counterparty", "date"], sort=True)
+    peak_idx = by_day["exposure"].idxmax()
+    out = pd.DataFrame({
+        "carried_in_idr": by_day["carried_in"].first(),
+        "peak_exposure_idr": by_day["exposure"].max(),
+        "peak_at": pd.to_datetime(events.loc[peak_idx.to_numpy(), "time"].to_numpy()),
+    })
+    # exposure carried over midnight can exceed every level reached that day
+    carried_peak = out["carried_in_idr"] > out["peak_exposure_idr"]
+    out.loc[carried_peak, "peak_exposure_idr"] = out.loc[carried_peak, "carried_in_idr"]
+    out.loc[carried_peak, "peak_at"] = out.index.get_level_values("date")[carried_peak.to_numpy()]
+    return out.reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treasury positions and unsettled exposure")
+    parser.add_argument("--at", default="2024-12-31 23:59:59", help="as-of timestamp")
+    parser.add_argument("--top", type=int, default=5, help="counterparties to list by peak exposure")
+    args = parser.parse_args()
+
+    import refdata
+
+    ledger = pd.read_csv(os.path.join(DATA_DIR, "03_account_ledger.csv"))
+    started = time.perf_counter()
+    book = PositionBook.from_ledger(ledger)
+    built = time.perf_counter() - started
+
+    print(f"Built {len(book.timelines)} account timelines from {len(ledger):,} legs in {built * 1000:.1f} ms")
+    print(f"\nPositions as of {args.at} (IDR):")
+    for account_type in ("Bank", "Wallet"):
+        for acc, bal in book.balances(args.at, account_type).items():
+            print(f"  {account_type:<7} {acc:<18} {bal:>22,.0f}")
+
+    tx = refdata.load_transactions(os.path.join(DATA_DIR, "01_transactions.csv"))
+    started = time.perf_counter()
+    exposure = unsettled_exposure(tx, counterparty="client_name", horizon=args.at)
+    swept = time.perf_counter() - started
+    peaks = exposure.sort_values("peak_exposure_idr", ascending=False).drop_duplicates("counterparty")
+    open_trades = (tx["status"] != "SETTLED").sum()
+    print(f"\nPeak intraday unsettled exposure up to {args.at}, incl. {open_trades:,} trades not yet settled"
+          f" ({swept * 1000:.1f} ms, {len(exposure):,} counterparty-days):")
+    for _, row in peaks.head(args.top).iterrows():
+        print(f"  {row['counterparty']:<28} IDR {row['peak_exposure_idr'] / 1e9:>6.2f}B at {row['peak_at']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Cold-start benchmark for the pricer: time from interpreter launch to the
+# first /health response, the latency users see on a fresh serverless
+# instance. Each run is a new process; the app is driven in-process over ASGI
+# so no server or HTTP client is involved.
+
+CHILD = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+
+async def first_response():
+    messages = []
+    scope = {"type": "http", "method": "GET", "path": "/health", "raw_path": b"/health",
+             "query_string": b"", "headers": [], "http_version": "1.1", "scheme": "http",
+             "server": ("bench", 80), "client": ("bench", 0), "root_path": ""}
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    await main.app(scope, receive, send)
+    return messages[0]["status"]
+
+status = asyncio.run(first_response())
+t2 = time.perf_counter()
+print(json.dumps({"import_s": t1 - t0, "first_response_s": t2 - t1, "status": status}))
+"""
+
+def run_once():
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["total_s"] = time.perf_counter() - started
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pricer import-to-first-response time")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    run_once()  # warm the OS page cache / .pyc files
+    runs = [run_once() for _ in range(args.runs)]
+    print(f"{'phase':<16} {'median ms':>10} {'p90 ms':>10}")
+    for key in ("import_s", "first_response_s", "total_s"):
+        values = sorted(r[key] * 1000 for r in runs)
+        p90 = values[min(len(values) - 1, int(len(values) * 0.9))]
+        print(f"{key[:-2]:<16} {statistics.median(values):>10.1f} {p90:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import multiprocessing as mp
+import os
+import time
+
+from config import PARAMS, SHM_ENV_VAR
+from shared_params import SharedParams
+
+# Quote throughput vs. worker count in shared-memory mode.
+# Each worker process attaches to the params segment and calls the /quote
+# handler directly (no HTTP), so the numbers isolate pricing + parameter
+# reads from network/server overhead. They show that the handler and the
+# shared segment scale across processes, not that a served deployment does:
+# uvicorn, the socket accept path and the load generator are not measured.
+#
+# All workers start and stop together: a two-phase barrier holds everyone
+# until the slowest worker has finished importing, then one deadline (on the
+# system-wide monotonic clock) is shared by every process.
+
+PAIRS = list(PARAMS["spreads"].keys())
+
+def _worker(shm_name, barrier, deadline, results):
+    os.environ[SHM_ENV_VAR] = shm_name
+    from main import get_quote
+    from models import QuoteRequest
+
+    requests = [QuoteRequest(pair=p, volume=1000, client_tier=t) for p in PAIRS for t in "ABC"]
+    barrier.wait()  # ready
+    barrier.wait()  # go: deadline has been published
+    count = 0
+    end = deadline.value
+    while time.monotonic() < end:
+        for req in requests:
+            get_quote(req)
+        count += len(requests)
+    results.put(count)
+
+def run(shm_name, workers, duration):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers + 1)
+    deadline = ctx.Value("d", 0.0)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(shm_name, barrier, deadline, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    barrier.wait()
+    deadline.value = time.monotonic() + duration
+    barrier.wait()
+    total = sum(results.get() for _ in procs)
+    for p in procs:
+        p.join()
+    return total / duration
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pricer quote throughput across workers")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    shared = SharedParams.create(PARAMS)
+    try:
+        counts = sorted({1, args.max_workers} | {n for n in (2, 4, 8, 16, 32) if n < args.max_workers})
+        base = None
+        print(f"{'workers':>8} {'quotes/s':>12} {'speedup':>8} {'efficiency':>10}")
+        for n in counts:
+            qps = run(shared.name, n, args.duration)
+            base = base or qps
+            print(f"{n:>8} {qps:>12,.0f} {qps / base:>7.2f}x {qps / base / n:>9.0%}")
+    finally:
+        shared.close()
+
+if __name__ == "__main__":
+    main()
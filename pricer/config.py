@@ -7,7 +7,17 @@ PARAMS = {
         "USDC/IDR": {"A": 18, "B": 22, "C": 27},
         "BTC/IDR":  {"A": 55, "B": 75, "C": 100},
         "PAXG/IDR": {"A": 70, "B": 95, "C": 130},
+    },
+    # indicative MM rates, used when a quote request omits mm_rate
+    "mm_rates": {
+        "USDT/IDR": 15800.0,
+        "USDC/IDR": 15800.0,
+        "BTC/IDR":  650000000.0,
+        "PAXG/IDR": 30000000.0,
     }
 }
 
 API_KEY = "otc-secret-key-2024"
+
+# multi-worker mode: name of the shared-memory parameter segment (see serve.py)
+SHM_ENV_VAR = "OTC_PRICER_SHM"
@@ -1,19 +1,36 @@
 from fastapi import FastAPI, HTTPException, Header, Depends
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 import os
 from datetime import datetime
-from config import PARAMS, API_KEY
-from models import QuoteRequest, QuoteResponse, ParamsUpdateRequest
+from config import PARAMS, API_KEY, SHM_ENV_VAR
+from models import QuoteRequest, QuoteResponse, ParamsUpdateRequest, RatesUpdateRequest, ProfilerToggleRequest
+from metrics import METRICS, PROFILER, MetricsMiddleware
 
 app = FastAPI(title="OTC Pricer API")
+app.add_middleware(MetricsMiddleware, routes=app.routes)
 
-# Serve static files (CSS/JS)
-app.mount("/static", StaticFiles(directory="."), name="static")
+# Sampling profiler is off unless OTC_PROFILE=1 or toggled via PUT /debug/profile
+if os.environ.get("OTC_PROFILE") == "1":
+    PROFILER.start()
+
+# Multi-worker mode (serve.py): parameters live in a shared-memory segment
+# published by the parent process. Single-process/serverless: plain PARAMS.
+if os.environ.get(SHM_ENV_VAR):
+    from shared_params import SharedParams
+    shared = SharedParams.attach(os.environ[SHM_ENV_VAR])
+else:
+    shared = None
+
+def current_params():
+    return shared.read() if shared else PARAMS
+
+# Serve static files (CSS/JS) from public/ only, never the source directory
+app.mount("/static", StaticFiles(directory="public"), name="static")
 
 @app.get("/")
 async def read_index():
-    return FileResponse('index.html')
+    return FileResponse('public/index.html')
 
 def verify_api_key(x_api_key: str = Header(...)):
     if x_api_key != API_KEY:
@@ -24,25 +41,31 @@ def verify_api_key(x_api_key: str = Header(...)):
 def health():
     return {"status": "ok", "timestamp": datetime.now()}
 
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
 @app.post("/quote", response_model=QuoteResponse)
 def get_quote(request: QuoteRequest):
-    if request.pair not in PARAMS["spreads"]:
+    params = current_params()
+    if request.pair not in params["spreads"]:
         raise HTTPException(status_code=404, detail="Pair not found")
     
     tier = request.client_tier.upper()
-    if tier not in PARAMS["spreads"][request.pair]:
+    if tier not in params["spreads"][request.pair]:
         raise HTTPException(status_code=400, detail="Invalid client tier")
         
-    spread_bps = PARAMS["spreads"][request.pair][tier]
+    spread_bps = params["spreads"][request.pair][tier]
     spread_rate = spread_bps / 10000
-    tax_rate = PARAMS["tax_rate"]
+    tax_rate = params["tax_rate"]
+    mm_rate = request.mm_rate if request.mm_rate is not None else params["mm_rates"][request.pair]
     
     # Pricing formula
     # Client BUY quote = MM rate × (1 + spread_rate + 0.0021)
     # Client SELL quote = MM rate × (1 − spread_rate − 0.0021)
     
-    buy_quote = request.mm_rate * (1 + spread_rate + tax_rate)
-    sell_quote = request.mm_rate * (1 - spread_rate - tax_rate)
+    buy_quote = mm_rate * (1 + spread_rate + tax_rate)
+    sell_quote = mm_rate * (1 - spread_rate - tax_rate)
     
     idr_total_buy = request.volume * buy_quote
     idr_total_sell = request.volume * sell_quote
@@ -50,14 +73,14 @@ def get_quote(request: QuoteRequest):
     # Gross spread is the difference between client price and MM price
     # For a Buy: Client pays more than MM rate
     # For a Sell: Client receives less than MM rate
-    idr_mm_amount = request.volume * request.mm_rate
+    idr_mm_amount = request.volume * mm_rate
     gross_spread_idr = abs(idr_total_buy - idr_mm_amount) if idr_total_buy > idr_mm_amount else abs(idr_total_sell - idr_mm_amount)
     # Corrected logic for response:
     # If it was a BUY request... but since we return both Buy/Sell quotes, 
     # we'll just return the spread based on the provided MM rate.
     # Gross spread per unit = mm_rate * spread_rate
-    gross_spread_idr = request.volume * request.mm_rate * spread_rate
-    tax_idr = request.volume * request.mm_rate * tax_rate # Simplified tax on MM base for indicative
+    gross_spread_idr = request.volume * mm_rate * spread_rate
+    tax_idr = request.volume * mm_rate * tax_rate # Simplified tax on MM base for indicative
     # Actually, business rules say tax on client-facing IDR amount.
     # We'll use BUY quote for the spread calculation here as an indicative.
     tax_idr = idr_total_buy * tax_rate
@@ -65,7 +88,7 @@ def get_quote(request: QuoteRequest):
 
     return QuoteResponse(
         pair=request.pair,
-        mm_rate=request.mm_rate,
+        mm_rate=mm_rate,
         volume=request.volume,
         spread_bps=spread_bps,
         tax_rate=tax_rate,
@@ -82,14 +105,44 @@ def get_quote(request: QuoteRequest):
 
 @app.get("/params")
 def get_params():
-    return PARAMS
+    return current_params()
 
 @app.put("/params")
 def update_params(update: ParamsUpdateRequest, x_api_key: str = Depends(verify_api_key)):
-    if update.pair not in PARAMS["spreads"]:
+    params = current_params()
+    if update.pair not in params["spreads"]:
         raise HTTPException(status_code=404, detail="Pair not found")
-    if update.tier not in PARAMS["spreads"][update.pair]:
+    if update.tier not in params["spreads"][update.pair]:
         raise HTTPException(status_code=400, detail="Invalid tier")
     
-    PARAMS["spreads"][update.pair][update.tier] = update.new_spread_bps
+    if shared:
+        shared.set_spread(update.pair, update.tier, update.new_spread_bps)
+    else:
+        PARAMS["spreads"][update.pair][update.tier] = update.new_spread_bps
     return {"status": "updated", "pair": update.pair, "tier": update.tier, "new_spread_bps": update.new_spread_bps}
+
+@app.put("/rates")
+def update_rates(update: RatesUpdateRequest, x_api_key: str = Depends(verify_api_key)):
+    if update.pair not in current_params()["mm_rates"]:
+        raise HTTPException(status_code=404, detail="Pair not found")
+    
+    if shared:
+        shared.set_mm_rate(update.pair, update.mm_rate)
+    else:
+        PARAMS["mm_rates"][update.pair] = update.mm_rate
+    return {"status": "updated", "pair": update.pair, "mm_rate": update.mm_rate}
+
+@app.get("/debug/profile")
+def get_profile(x_api_key: str = Depends(verify_api_key)):
+    # collapsed stacks, feed to flamegraph.pl or speedscope
+    return PlainTextResponse(PROFILER.collapsed())
+
+@app.put("/debug/profile")
+def toggle_profile(toggle: ProfilerToggleRequest, x_api_key: str = Depends(verify_api_key)):
+    if toggle.reset:
+        PROFILER.reset()
+    if toggle.enabled:
+        PROFILER.start()
+    else:
+        PROFILER.stop()
+    return {"status": "updated", "profiling": PROFILER.running}
@@ -0,0 +1,185 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+from starlette.routing import Match
+
+# Lightweight request instrumentation for the pricer: per-route latency
+# histograms + in-flight gauge rendered in Prometheus text format, and an
+# opt-in sampling profiler. No client library needed, so serverless cold
+# starts stay cheap.
+#
+# In multi-worker mode (serve.py) each worker keeps its own registry; scrape
+# with a per-process label or aggregate at the Prometheus side.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}      # (method, route, status) -> Histogram
+        self.in_flight = Counter()  # route -> gauge
+
+    def start(self, route):
+        with self._lock:
+            self.in_flight[route] += 1
+
+    def finish(self, method, route, status, seconds):
+        with self._lock:
+            self.in_flight[route] -= 1
+            key = (method, route, status)
+            hist = self.latency.get(key)
+            if hist is None:
+                hist = self.latency[key] = Histogram()
+            hist.observe(seconds)
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = [
+            "# HELP pricer_request_duration_seconds Request latency by route.",
+            "# TYPE pricer_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (method, route, status), hist in sorted(self.latency.items()):
+                labels = f'method="{method}",route="{route}",status="{status}"'
+                cumulative = 0
+                for upper, n in zip(hist.buckets, hist.counts):
+                    cumulative += n
+                    lines.append(f'pricer_request_duration_seconds_bucket{{{labels},le="{upper}"}} {cumulative}')
+                lines.append(f'pricer_request_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"pricer_request_duration_seconds_sum{{{labels}}} {hist.total}")
+                lines.append(f"pricer_request_duration_seconds_count{{{labels}}} {hist.count}")
+            lines.append("# HELP pricer_requests_in_flight Requests currently being served.")
+            lines.append("# TYPE pricer_requests_in_flight gauge")
+            for route, n in sorted(self.in_flight.items()):
+                lines.append(f'pricer_requests_in_flight{{route="{route}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Registry()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware overhead).
+
+    Requests are labelled by route template rather than raw path, so static
+    files and unknown URLs do not explode label cardinality.
+    """
+
+    def __init__(self, app, routes, registry=METRICS):
+        self.app = app
+        self.routes = routes
+        self.registry = registry
+
+    def _route_label(self, scope):
+        # same resolution as the router: first full match wins, otherwise the
+        # first partial (path matches, method doesn't -> 405) keeps its route
+        partial = None
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path
+        return partial or "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_label(scope)
+        status = 500
+        started = time.perf_counter()
+        self.registry.start(route)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.registry.finish(scope["method"], route, status, time.perf_counter() - started)
+
+
+class SamplingProfiler:
+    """Opt-in wall-clock sampler for production debugging.
+
+    A daemon thread snapshots every thread's stack via sys._current_frames()
+    at a fixed interval and counts collapsed stacks (flamegraph.pl / speedscope
+    input). Overhead is proportional to the sampling rate, zero when stopped.
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = Counter()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                with self._lock:
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        with self._lock:
+            top = self.samples.most_common()
+        return "\n".join(f"{stack} {n}" for stack, n in top) + "\n"
+
+
+PROFILER = SamplingProfiler()
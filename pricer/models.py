@@ -1,10 +1,10 @@
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 
 class QuoteRequest(BaseModel):
     pair: str
-    mm_rate: float
+    mm_rate: Optional[float] = None  # defaults to the published MM rate
     volume: float
     client_tier: str = "A"
 
@@ -28,3 +28,11 @@ class ParamsUpdateRequest(BaseModel):
     pair: str
     tier: str
     new_spread_bps: int
+
+class RatesUpdateRequest(BaseModel):
+    pair: str
+    mm_rate: float
+
+class ProfilerToggleRequest(BaseModel):
+    enabled: bool
+    reset: bool = False
@@ -0,0 +1,32 @@
+import argparse
+import os
+
+import uvicorn
+
+from config import PARAMS, SHM_ENV_VAR
+from shared_params import SharedParams
+
+# Multi-process serving mode for our own hosts (vercel.json covers serverless).
+# The parent publishes the compiled spread/tax table and MM rates into a
+# shared-memory segment; every uvicorn worker attaches to it by name and reads
+# it per request without IPC. PUT /params and PUT /rates on any worker are
+# visible to all of them.
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the OTC pricer with multiple workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    shared = SharedParams.create(PARAMS)
+    os.environ[SHM_ENV_VAR] = shared.name
+    try:
+        print(f"OTC Pricer: {args.workers} workers on http://{args.host}:{args.port} (params segment {shared.name})")
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+    finally:
+        shared.close()
+
+if __name__ == "__main__":
+    main()
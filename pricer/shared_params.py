@@ -0,0 +1,142 @@
+import fcntl
+import os
+import struct
+import tempfile
+import time
+from multiprocessing import shared_memory
+
+from config import PARAMS
+
+# Compiled layout of the spread/tax table + MM rates, fixed at import time
+# from config.PARAMS. Pairs and tiers are addressed by position, so the
+# segment itself only holds numbers.
+#
+#   offset 0   uint64   seq       (seqlock counter, odd = write in progress)
+#   offset 8   float64  tax_rate
+#   ...        int64    spreads[pair][tier]
+#   ...        float64  mm_rates[pair]
+PAIRS = list(PARAMS["spreads"].keys())
+TIERS = list(next(iter(PARAMS["spreads"].values())).keys())
+PAIR_INDEX = {p: i for i, p in enumerate(PAIRS)}
+TIER_INDEX = {t: i for i, t in enumerate(TIERS)}
+
+_SEQ = struct.Struct("<Q")
+_BODY = struct.Struct(f"<d{len(PAIRS) * len(TIERS)}q{len(PAIRS)}d")
+SEGMENT_SIZE = _SEQ.size + _BODY.size
+
+
+def compile_params(params):
+    """Flatten a PARAMS-shaped dict into the segment body values."""
+    values = [params["tax_rate"]]
+    for pair in PAIRS:
+        values.extend(int(params["spreads"][pair][tier]) for tier in TIERS)
+    values.extend(float(params["mm_rates"][pair]) for pair in PAIRS)
+    return values
+
+
+def expand_params(values):
+    """Inverse of compile_params: rebuild the PARAMS-shaped dict."""
+    n_spreads = len(PAIRS) * len(TIERS)
+    spreads = {}
+    for i, pair in enumerate(PAIRS):
+        row = values[1 + i * len(TIERS):1 + (i + 1) * len(TIERS)]
+        spreads[pair] = dict(zip(TIERS, row))
+    mm_rates = dict(zip(PAIRS, values[1 + n_spreads:]))
+    return {"tax_rate": values[0], "spreads": spreads, "mm_rates": mm_rates}
+
+
+class SharedParams:
+    """Pricer parameters in a shared-memory segment, guarded by a seqlock.
+
+    Readers never take a lock: they read the sequence counter, copy the body
+    and re-check the counter, retrying if a write was in progress or landed
+    in between. Writers serialise on a file lock and bump the counter to odd
+    before and back to even after touching the body.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._buf = shm.buf
+        self._owner = owner
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{shm.name.lstrip('/')}.lock")
+        self._cached_seq = None
+        self._cached = None
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @classmethod
+    def create(cls, params=PARAMS, name=None):
+        name = name or f"otc_pricer_{os.getpid()}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=SEGMENT_SIZE)
+        _SEQ.pack_into(shm.buf, 0, 0)
+        _BODY.pack_into(shm.buf, _SEQ.size, *compile_params(params))
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        # Only the creating process may unlink the segment. Workers spawned by
+        # serve.py share its resource tracker, so on older Pythons attaching
+        # does not schedule a second cleanup.
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    def version(self):
+        return _SEQ.unpack_from(self._buf, 0)[0]
+
+    def read(self):
+        """Return a consistent PARAMS-shaped snapshot (do not mutate it)."""
+        while True:
+            seq = _SEQ.unpack_from(self._buf, 0)[0]
+            if seq == self._cached_seq:
+                return self._cached
+            if seq & 1:
+                time.sleep(0)
+                continue
+            values = _BODY.unpack_from(self._buf, _SEQ.size)
+            if _SEQ.unpack_from(self._buf, 0)[0] == seq:
+                break
+        self._cached = expand_params(values)
+        self._cached_seq = seq
+        return self._cached
+
+    def _update(self, mutate):
+        with open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                seq = _SEQ.unpack_from(self._buf, 0)[0]
+                values = list(_BODY.unpack_from(self._buf, _SEQ.size))
+                mutate(values)
+                _SEQ.pack_into(self._buf, 0, seq + 1)
+                _BODY.pack_into(self._buf, _SEQ.size, *values)
+                _SEQ.pack_into(self._buf, 0, seq + 2)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def set_spread(self, pair, tier, spread_bps):
+        idx = 1 + PAIR_INDEX[pair] * len(TIERS) + TIER_INDEX[tier]
+
+        def mutate(values):
+            values[idx] = int(spread_bps)
+        self._update(mutate)
+
+    def set_mm_rate(self, pair, mm_rate):
+        idx = 1 + len(PAIRS) * len(TIERS) + PAIR_INDEX[pair]
+
+        def mutate(values):
+            values[idx] = float(mm_rate)
+        self._update(mutate)
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+            try:
+                os.remove(self._lock_path)
+            except FileNotFoundError:
+                pass
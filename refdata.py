@@ -0,0 +1,117 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Reference-data layer. Each ref_*.csv is loaded once into column arrays keyed
+# by an integer code (row position), with a hash index from string id -> code
+# and lazily built secondary indexes (e.g. wallets by asset). The transaction
+# store keeps only ids; names, types and tiers are resolved here with a
+# vectorized join at read time, so a reference update (a client moving tier,
+# a renamed market maker) never requires rewriting historical transactions.
+
+PROJECT_ROOT = os.environ.get("OTC_PROJECT_ROOT", os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+
+REF_FILES = {
+    "clients": "ref_clients.csv",
+    "market_makers": "ref_market_makers.csv",
+    "banks": "ref_bank_accounts.csv",
+    "wallets": "ref_wallets.csv",
+    "exchanges": "ref_exchanges.csv",
+}
+
+# denormalized column -> (table, id column in transactions, ref column)
+ENRICH_COLUMNS = {
+    "client_name": ("clients", "client_id", "name"),
+    "client_type": ("clients", "client_id", "type"),
+    "client_tier": ("clients", "client_id", "tier"),
+    "market_maker_name": ("market_makers", "market_maker_id", "name"),
+}
+
+
+class RefTable:
+    def __init__(self, frame):
+        self.ids = frame["id"].to_numpy()
+        self.columns = {c: frame[c].to_numpy() for c in frame.columns}
+        self.index = {id_: code for code, id_ in enumerate(self.ids)}
+        self._id_index = pd.Index(self.ids)
+        self._secondary = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def code(self, id_):
+        return self.index[id_]
+
+    def codes(self, ids):
+        """Vectorized id -> code; raises KeyError on ids not in the table."""
+        codes = self._id_index.get_indexer(ids)
+        if (codes < 0).any():
+            unknown = pd.Series(ids)[codes < 0].unique()
+            raise KeyError(f"unknown reference ids: {list(unknown[:5])}")
+        return codes
+
+    def column(self, name):
+        return self.columns[name]
+
+    def where(self, column, value):
+        """Codes of rows with column == value (hash index built on first use)."""
+        index = self._secondary.get(column)
+        if index is None:
+            index = {}
+            for code, v in enumerate(self.columns[column]):
+                index.setdefault(v, []).append(code)
+            index = self._secondary[column] = {v: np.array(c) for v, c in index.items()}
+        return index.get(value, np.array([], dtype=int))
+
+
+class ReferenceData:
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        self.tables = {name: RefTable(pd.read_csv(os.path.join(data_dir, f)))
+                       for name, f in REF_FILES.items()}
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["tables"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def enrich(self, df, columns=ENRICH_COLUMNS):
+        """Return a copy of df with denormalized reference columns joined in.
+
+        Each id column is resolved to codes once and every requested column is
+        a single array take. New columns are placed right after their id
+        column, matching the historical 01_transactions.csv layout.
+        """
+        out = df.drop(columns=[c for c in columns if c in df.columns])
+        codes = {}
+        for col, (table, key, ref_col) in columns.items():
+            if key not in codes:
+                codes[key] = self.tables[table].codes(out[key].to_numpy())
+            values = self.tables[table].column(ref_col)[codes[key]]
+            position = out.columns.get_loc(key) + 1
+            while position < len(out.columns) and out.columns[position] in columns:
+                position += 1
+            out.insert(position, col, values)
+        return out
+
+
+@lru_cache(maxsize=None)
+def load(data_dir=DATA_DIR):
+    return ReferenceData(data_dir)
+
+
+def load_transactions(path=None, enrich=True):
+    """Read 01_transactions.csv (ids only) and resolve names from the ref tables.
+
+    Denormalized columns already present in older files are dropped and
+    re-resolved, so the current reference data always wins.
+    """
+    path = path or os.path.join(DATA_DIR, "01_transactions.csv")
+    df = pd.read_csv(path)
+    if not enrich:
+        return df.drop(columns=[c for c in ENRICH_COLUMNS if c in df.columns])
+    return load(os.path.dirname(os.path.abspath(path))).enrich(df)